@@ -18,96 +18,229 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from datetime import datetime
+import asyncio
+from datetime import date
 import ssl
 import socket
 import argparse
 import sys
 import os
 import time
-import json
-from threading import Thread, Lock
-import concurrent.futures
-import configparser
-import logging
-
-
-class Colors:
-    RED = '\033[91m'
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    MAGENTA = '\033[95m'
-    CYAN = '\033[96m'
-    WHITE = '\033[97m'
-    BOLD = '\033[1m'
-    UNDERLINE = '\033[4m'
-    GRAY = '\033[90m'
-    END = '\033[0m'
-
-    @staticmethod
-    def disable():
-        Colors.RED = ''
-        Colors.GREEN = ''
-        Colors.YELLOW = ''
-        Colors.BLUE = ''
-        Colors.MAGENTA = ''
-        Colors.CYAN = ''
-        Colors.WHITE = ''
-        Colors.BOLD = ''
-        Colors.UNDERLINE = ''
-        Colors.GRAY = ''
-        Colors.END = ''
+from collections import namedtuple
+from itertools import zip_longest
+from operator import itemgetter
+
+
+_Palette = namedtuple('_Palette', 'RED GREEN YELLOW BLUE MAGENTA CYAN WHITE BOLD UNDERLINE GRAY END')
+_ANSI = _Palette('\033[91m', '\033[92m', '\033[93m', '\033[94m', '\033[95m', '\033[96m',
+                 '\033[97m', '\033[1m', '\033[4m', '\033[90m', '\033[0m')
+_PLAIN = _Palette(*[''] * len(_Palette._fields))
+COLORS = _ANSI  # switched to _PLAIN once in main() when output isn't a colour terminal
 
 
 DAYS_THRESHOLD = 15
 DEFAULT_PORT = 443
 CONNECT_TIMEOUT = 10
+HAPPY_EYEBALLS_DELAY = 0.25  # seconds before racing the next address (RFC 8305)
+DEFAULT_WORKERS = 32  # checks wait on the network, not the CPU, so this ignores cpu_count()
+RESOLVER_THREADS = 100  # blocking getaddrinfo() calls in flight at once
+
+CACHE_PATH = os.path.expanduser('~/.cache/sslcheck.json')
+CACHE_MAX_AGE = 24 * 3600  # seconds a cached expiry is trusted without a handshake
+CACHE_MARGIN_DAYS = 7      # only trust certs this far beyond the alert threshold
 
 SPINNER_CHARS = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
+FRAME_INTERVAL = 0.1  # seconds between live-display redraws
+
+BAR_WIDTH = 30
+_BAR_FULL = '█' * BAR_WIDTH
+_BAR_EMPTY = '░' * BAR_WIDTH
+
+# One context shared by every worker. We only read notAfter, never trust the
+# chain, so verification is off: expired / self-signed / mismatched certs are
+# reported on their real expiry from a single handshake. With nothing to
+# verify against, the system CA bundle is never loaded.
+_SSL_CTX = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+_SSL_CTX.check_hostname = False
+_SSL_CTX.verify_mode = ssl.CERT_NONE
+# Never resume: a resumed handshake skips the Certificate message and
+# getpeercert() would return the cert cached in the session, not the one
+# currently served. Don't ask servers to issue tickets we will discard.
+_SSL_CTX.options |= ssl.OP_NO_TICKET
+
+# --raw-hello: a fixed TLS 1.2 ClientHello offering the usual ECDHE/RSA AEAD
+# and CBC suites, so the server's Certificate can be read off the wire
+# without OpenSSL. Only SNI varies per host.
+_HELLO_CIPHERS = bytes.fromhex('c02bc02fc02cc030cca9cca8c009c013c00ac014009c009d002f0035')
+_HELLO_EXTENSIONS = bytes.fromhex(
+    '000a000800060017001d0018'                            # supported_groups
+    '000b00020100'                                        # ec_point_formats
+    '000d00160014040305030603080408050806040105010601'    # signature_algorithms
+    '0201'
+    'ff01000100'                                          # renegotiation_info
+)
+_RAW_MAX_BYTES = 1 << 18  # give up on servers that send this much before the Certificate
+
+
+def _parse_config(lines):
+    """Parse the [DEFAULT] keys of an INI-style file into a dict of strings."""
+    values = {}
+    key = None
+    in_default = True
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped[0] in '#;':
+            continue
+        if stripped.startswith('['):
+            in_default = stripped == '[DEFAULT]'
+            key = None
+        elif not in_default:
+            continue
+        elif line[0].isspace() and key:
+            values[key] += '\n' + stripped  # continuation of the previous value
+        else:
+            seps = [i for i in (line.find('='), line.find(':')) if i != -1]
+            if not seps:
+                key = None
+                continue
+            key = line[:min(seps)].strip().lower()
+            values[key] = line[min(seps) + 1:].strip()
+    return values
 
 
 def load_config(config_file=None):
-    """Load configuration from file"""
-    config = configparser.ConfigParser()
-    config_files = []
+    """Load settings from ~/sslcheck.conf, ./sslcheck.conf and -c, later files winning."""
+    paths = [os.path.expanduser('~/sslcheck.conf'), 'sslcheck.conf']
     if config_file:
-        config_files.append(config_file)
-    home_config = os.path.expanduser('~/sslcheck.conf')
-    if os.path.exists(home_config):
-        config_files.append(home_config)
-    local_config = 'sslcheck.conf'
-    if os.path.exists(local_config):
-        config_files.append(local_config)
-    if config_files:
-        config.read(config_files)
-        return config
-    return None
-
-
-def parse_domains_from_config(config):
-    domains = []
-    if config and config.has_option('DEFAULT', 'domains'):
-        domains_str = config.get('DEFAULT', 'domains')
-        domains = [d.strip() for d in domains_str.split(',') if d.strip()]
-    return domains
-
-
-def get_alert_days_from_config(config):
-    if config and config.has_option('DEFAULT', 'alert_days'):
+        paths.append(config_file)
+    raw = {}
+    for path in paths:
         try:
-            return int(config.get('DEFAULT', 'alert_days'))
+            with open(path) as f:
+                raw.update(_parse_config(f))
+        except OSError:
+            pass
+    config = {}
+    if 'domains' in raw:
+        config['domains'] = list(filter(None, map(str.strip, raw['domains'].replace('\n', ',').split(','))))
+    if 'alert_days' in raw:
+        try:
+            config['alert_days'] = int(raw['alert_days'])
         except ValueError:
             pass
-    return DAYS_THRESHOLD
+    if 'cdn_ranges' in raw:
+        import ipaddress
+        networks = []
+        for r in raw['cdn_ranges'].replace('\n', ',').split(','):
+            try:
+                networks.append(ipaddress.ip_network(r.strip(), strict=False))
+            except ValueError:
+                pass
+        config['cdn_ranges'] = networks
+    return config
+
+
+def parse_target(entry, default_port):
+    """Split 'host', 'host:port' or '[v6addr]:port' into a canonical (host, port)."""
+    host, port = entry, default_port
+    if entry.startswith('['):
+        host, _, rest = entry[1:].partition(']')
+        if rest[:1] == ':' and rest[1:].isdigit():
+            port = int(rest[1:])
+    elif entry.count(':') == 1:
+        name, _, rest = entry.partition(':')
+        if rest.isdigit():
+            host, port = name, int(rest)
+    return host.lower().rstrip('.'), port
+
+
+def dedupe_targets(entries, default_port):
+    """Return {label: (host, port)} with one label per distinct target, in input order."""
+    seen = {}
+    for entry in entries:
+        entry = entry.strip()
+        if entry:
+            seen.setdefault(parse_target(entry, default_port), entry)
+    return {label: target for target, label in seen.items()}
 
 
 def setup_logging(log_file):
+    import logging
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s',
         handlers=[logging.FileHandler(log_file)],
     )
+    return logging.getLogger('sslcheck')
+
+
+def load_cache(path):
+    """Load the expiry cache; a missing or corrupt file is an empty cache."""
+    import json
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(path, cache):
+    """Atomically rewrite the expiry cache. Failures are not fatal."""
+    import json
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        parent = os.path.dirname(path)
+        if parent:  # a bare file name lives in the working directory
+            os.makedirs(parent, exist_ok=True)
+        with open(tmp, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _cache_entry(cache, domain, port):
+    """Return (expiry, checked) from a well-formed cache entry, else None."""
+    entry = cache.get(f"{domain}:{port}")
+    if not isinstance(entry, dict):
+        return None
+    try:
+        return date.fromisoformat(entry['expiry']), float(entry['checked'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def cached_expiry(cache, domain, port, today, threshold):
+    """Return the cached expiry date if it is recent and far from the threshold.
+
+    `today` is date.today().toordinal().
+    """
+    entry = _cache_entry(cache, domain, port)
+    if entry is None:
+        return None
+    expiry, checked = entry
+    if time.time() - checked > CACHE_MAX_AGE:
+        return None
+    if expiry.toordinal() - today <= threshold + CACHE_MARGIN_DAYS:
+        return None
+    return expiry
+
+
+def raw_probe_enough(cache, domain, port, today, threshold):
+    """True if the cached cert expires more than twice the threshold out.
+
+    Such a domain is re-checked with the --raw-hello probe even when the flag
+    isn't given: a cert that far out rarely matters beyond confirming it.
+    """
+    entry = _cache_entry(cache, domain, port)
+    return entry is not None and entry[0].toordinal() - today > 2 * threshold
+
+
+def cert_fingerprint(der):
+    """SHA-256 fingerprint of a DER certificate, as hex."""
+    import hashlib
+    return hashlib.sha256(der).hexdigest()
 
 
 def _asn1_len(data, i):
@@ -131,17 +264,23 @@ def _asn1_skip(data, i):
     return i + length
 
 
-def _extract_not_after(der):
-    """Extract notAfter date from an X.509 DER-encoded certificate."""
-    i = 0
-    if der[i] != 0x30:
+def _tbs_start(der):
+    """Return (offset of serialNumber, end offset) of the tbsCertificate in der."""
+    if der[0] != 0x30:
         raise ValueError("expected outer SEQUENCE")
-    _, i = _asn1_len(der, i + 1)
+    _, i = _asn1_len(der, 1)
     if der[i] != 0x30:
         raise ValueError("expected tbsCertificate SEQUENCE")
-    _, i = _asn1_len(der, i + 1)
+    length, i = _asn1_len(der, i + 1)
+    end = i + length
     if der[i] == 0xA0:  # [0] EXPLICIT version, optional
         i = _asn1_skip(der, i)
+    return i, end
+
+
+def _extract_not_after(der):
+    """Extract notAfter date from an X.509 DER-encoded certificate."""
+    i, _ = _tbs_start(der)
     i = _asn1_skip(der, i)  # serialNumber
     i = _asn1_skip(der, i)  # signature AlgorithmIdentifier
     i = _asn1_skip(der, i)  # issuer
@@ -152,49 +291,303 @@ def _extract_not_after(der):
     tag = der[i]
     i += 1
     length, i = _asn1_len(der, i)
-    time_str = der[i:i + length].decode('ascii')
-    if tag == 0x17:  # UTCTime: YYMMDDHHMMSSZ
-        return datetime.strptime(time_str, '%y%m%d%H%M%SZ').date()
+    value = der[i:i + length]  # int() parses ASCII digits straight from bytes
+    if tag == 0x17:  # UTCTime: YYMMDDHHMMSSZ, YY >= 50 means 19YY (RFC 5280)
+        if length != 13 or value[12] != 0x5A:
+            raise ValueError("malformed UTCTime")
+        year = int(value[0:2])
+        year += 1900 if year >= 50 else 2000
+        return date(year, int(value[2:4]), int(value[4:6]))
     if tag == 0x18:  # GeneralizedTime: YYYYMMDDHHMMSSZ
-        return datetime.strptime(time_str, '%Y%m%d%H%M%SZ').date()
+        if length != 15 or value[14] != 0x5A:
+            raise ValueError("malformed GeneralizedTime")
+        return date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
     raise ValueError(f"unexpected time tag 0x{tag:02x}")
 
 
-def get_certificate_expiry(domain, port=DEFAULT_PORT):
+_SAN_OID = b'\x06\x03\x55\x1d\x11'  # OID 2.5.29.17, subjectAltName
+
+
+def _extract_dns_names(der):
+    """Extract the lowercased dNSName entries of the subjectAltName extension."""
+    i, end = _tbs_start(der)
+    for _ in range(6):  # serialNumber, signature, issuer, validity, subject, subjectPublicKeyInfo
+        i = _asn1_skip(der, i)
+    while i < end and der[i] != 0xA3:  # skip optional [1]/[2] unique IDs
+        i = _asn1_skip(der, i)
+    if i >= end:
+        return []
+    _, i = _asn1_len(der, i + 1)  # [3] EXPLICIT extensions
+    length, i = _asn1_len(der, i + 1)  # SEQUENCE OF Extension
+    end = i + length
+    while i < end:
+        length, j = _asn1_len(der, i + 1)
+        i = j + length
+        if der[j:j + len(_SAN_OID)] != _SAN_OID:
+            continue
+        j += len(_SAN_OID)
+        if der[j] == 0x01:  # critical BOOLEAN, optional
+            j = _asn1_skip(der, j)
+        _, j = _asn1_len(der, j + 1)  # extnValue OCTET STRING
+        length, j = _asn1_len(der, j + 1)  # GeneralNames SEQUENCE
+        names_end = j + length
+        names = []
+        while j < names_end:
+            tag = der[j]
+            length, j = _asn1_len(der, j + 1)
+            if tag == 0x82:  # [2] dNSName
+                names.append(der[j:j + length].decode('ascii').lower())
+            j += length
+        return names
+    return []
+
+
+async def resolve(domain, port, executor=None):
+    """Resolve domain to a list of (family, sockaddr) TCP endpoints.
+
+    getaddrinfo() blocks, so it runs on `executor`, or on the loop's default
+    executor when none is given.
+    """
+    loop = asyncio.get_event_loop()
+    infos = await loop.run_in_executor(executor, socket.getaddrinfo, domain, port, 0, socket.SOCK_STREAM)
+    return [(family, sockaddr) for family, _, _, _, sockaddr in infos]
+
+
+def san_covers(names, host):
+    """True if host matches one of names, allowing a '*' as the whole left-most label."""
+    if host in names:
+        return True
+    _, dot, parent = host.partition('.')
+    return bool(dot) and f"*.{parent}" in names
+
+
+def endpoint_key(addrs, port, networks=()):
+    """Group key for --share-san: the first CDN network holding an address, else the lowest address."""
+    ips = [sockaddr[0] for _, sockaddr in addrs]
+    if networks:
+        import ipaddress
+        for ip in ips:
+            try:
+                addr = ipaddress.ip_address(ip)
+            except ValueError:
+                continue
+            for net in networks:
+                if addr in net:
+                    return str(net), port
+    return min(ips), port
+
+
+def _interleave(addrs):
+    """Reorder addrs to alternate address families, keeping resolver order within each."""
+    by_family = {}
+    for addr in addrs:
+        by_family.setdefault(addr[0], []).append(addr)
+    return [addr for row in zip_longest(*by_family.values()) for addr in row if addr]
+
+
+async def _connect(addrs):
+    """Return a connected non-blocking socket, racing addresses Happy Eyeballs style.
+
+    Address families are interleaved and each attempt gets HAPPY_EYEBALLS_DELAY
+    seconds, or until it fails, before the next starts alongside it. The
+    first to connect wins and the rest are cancelled.
+    """
+    loop = asyncio.get_event_loop()
+
+    async def attempt(family, sockaddr):
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.setblocking(False)
+            await loop.sock_connect(sock, sockaddr)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    queue = _interleave(addrs)
+    attempts, running = [], set()
+    winner = None
+    error = OSError("no addresses to connect to")
+    try:
+        while queue or running:
+            if queue:
+                attempts.append(asyncio.ensure_future(attempt(*queue.pop(0))))
+                running.add(attempts[-1])
+            done, running = await asyncio.wait(running, timeout=HAPPY_EYEBALLS_DELAY if queue else None,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner = task.result()
+                    return winner
+                error = task.exception()
+        raise error
+    finally:
+        for task in attempts:
+            # Still running: cancel (attempt() closes its socket). Finished
+            # alongside the winner: close the extra socket.
+            if not task.cancel() and task.exception() is None and task.result() is not winner:
+                task.result().close()
+
+
+async def _handshake(domain, port, lookup):
+    addrs = await (lookup if lookup is not None else resolve(domain, port))
+    sock = await _connect(addrs)
+    return await asyncio.open_connection(sock=sock, ssl=_SSL_CTX, server_hostname=domain)
+
+
+async def fetch_certificate(domain, port=DEFAULT_PORT, lookup=None, timeout=CONNECT_TIMEOUT):
+    """Fetch the DER certificate served at domain:port. Returns (der, error).
+
+    `lookup` may be a resolve() task the caller started earlier, so DNS
+    overlaps with whatever the caller waited on before connecting.
+    """
+    try:
+        _, writer = await asyncio.wait_for(_handshake(domain, port, lookup), timeout=timeout)
+        try:
+            der = writer.get_extra_info('ssl_object').getpeercert(binary_form=True)
+        finally:
+            # Drop the connection without the close_notify exchange; nothing
+            # more is needed from the peer, and tickets are never read.
+            writer.transport.abort()
+    except asyncio.TimeoutError:
+        return None, "timed out"
+    except (ssl.SSLError, OSError, ValueError) as e:  # ValueError: IDNA-invalid name
+        return None, str(e)
+    if not der:
+        return None, "server presented no certificate"
+    return der, None
+
+
+def _client_hello(domain):
+    """Build a TLS 1.2 ClientHello record for domain, with SNI unless it is an IP literal."""
+    extensions = _HELLO_EXTENSIONS
     try:
-        context = ssl.create_default_context()
-        with socket.create_connection((domain, port), timeout=CONNECT_TIMEOUT) as sock:
-            with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                cert = ssock.getpeercert()
-        return datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z').date(), None
-    except ssl.SSLCertVerificationError:
-        pass  # fall through — retry unverified so we can still read notAfter
-    except (ssl.SSLError, socket.timeout, ConnectionError, OSError, ValueError, KeyError) as e:
+        socket.inet_pton(socket.AF_INET6 if ':' in domain else socket.AF_INET, domain)
+    except OSError:
+        name = domain.encode('idna')
+        sni = len(name).to_bytes(2, 'big') + name
+        sni = (len(sni) + 1).to_bytes(2, 'big') + b'\x00' + sni
+        extensions = b'\x00\x00' + len(sni).to_bytes(2, 'big') + sni + extensions
+    body = (b'\x03\x03' + os.urandom(32) + b'\x00'
+            + len(_HELLO_CIPHERS).to_bytes(2, 'big') + _HELLO_CIPHERS + b'\x01\x00'
+            + len(extensions).to_bytes(2, 'big') + extensions)
+    handshake = b'\x01' + len(body).to_bytes(3, 'big') + body
+    return b'\x16\x03\x01' + len(handshake).to_bytes(2, 'big') + handshake
+
+
+async def _read_certificate(readexactly):
+    """Read TLS records with readexactly(n) and return the first certificate.
+
+    Raises ValueError when the reply is not a TLS 1.2 handshake carrying a
+    certificate (alert, TLS 1.3-only server, not TLS at all).
+    """
+    handshake = bytearray()
+    received = 0
+    while received < _RAW_MAX_BYTES:
+        header = await readexactly(5)
+        body = await readexactly(int.from_bytes(header[3:5], 'big'))
+        received += 5 + len(body)
+        if header[0] == 21:
+            raise ValueError(f"TLS alert {body[-1]}" if body else "TLS alert")
+        if header[0] != 22:
+            raise ValueError("unexpected TLS record")
+        handshake += body
+        # Handshake messages may span records: drop whole ones until the
+        # Certificate (11) is at the front, then wait for its first entry.
+        while len(handshake) >= 4:
+            msg_type = handshake[0]
+            if msg_type == 11:
+                if len(handshake) >= 7 and not int.from_bytes(handshake[4:7], 'big'):
+                    raise ValueError("server presented no certificate")  # empty certificate_list
+                if len(handshake) >= 10:
+                    cert_len = int.from_bytes(handshake[7:10], 'big')
+                    if len(handshake) >= 10 + cert_len:
+                        if not cert_len:
+                            raise ValueError("server presented no certificate")
+                        return bytes(handshake[10:10 + cert_len])
+                break
+            if msg_type == 14:  # ServerHelloDone
+                raise ValueError("server presented no certificate")
+            msg_end = 4 + int.from_bytes(handshake[1:4], 'big')
+            if len(handshake) < msg_end:
+                break
+            del handshake[:msg_end]
+    raise ValueError("no certificate in server reply")
+
+
+async def _raw_certificate(domain, port, lookup):
+    """Send a raw ClientHello to domain and return the first certificate of the reply."""
+    addrs = await (lookup if lookup is not None else resolve(domain, port))
+    sock = await _connect(addrs)
+    reader, writer = await asyncio.open_connection(sock=sock)
+    try:
+        writer.write(_client_hello(domain))
+        return await _read_certificate(reader.readexactly)
+    finally:
+        writer.transport.abort()
+
+
+async def fetch_certificate_raw(domain, port=DEFAULT_PORT, lookup=None, timeout=CONNECT_TIMEOUT):
+    """Like fetch_certificate(), but read the certificate off a hand-built ClientHello.
+
+    Skips OpenSSL, key exchange and the rest of the handshake. Servers that
+    don't answer it with a TLS 1.2 Certificate get a regular handshake, within
+    what is left of the same timeout.
+    """
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + timeout
+    try:
+        return await asyncio.wait_for(_raw_certificate(domain, port, lookup), timeout=timeout), None
+    except asyncio.TimeoutError:
+        return None, "timed out"
+    except UnicodeError as e:  # IDNA-invalid name: a full handshake won't fare better
+        return None, str(e)
+    except (ValueError, EOFError, ConnectionResetError):
+        pass
+    except OSError as e:
         return None, str(e)
+    return await fetch_certificate(domain, port, lookup, deadline - loop.time())
+
 
-    # Verification failed (expired / self-signed / hostname mismatch / untrusted CA).
-    # Fetch the raw DER without validation and parse notAfter so we can report
-    # EXPIRED/EXPIRING instead of a generic error.
+async def get_certificate_expiry(domain, port=DEFAULT_PORT, lookup=None, timeout=CONNECT_TIMEOUT, raw=False):
+    fetch = fetch_certificate_raw if raw else fetch_certificate
+    der, error = await fetch(domain, port, lookup, timeout)
+    if error:
+        return None, error
     try:
-        context = ssl.create_default_context()
-        context.check_hostname = False
-        context.verify_mode = ssl.CERT_NONE
-        with socket.create_connection((domain, port), timeout=CONNECT_TIMEOUT) as sock:
-            with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                der = ssock.getpeercert(binary_form=True)
-        if not der:
-            return None, "server presented no certificate"
         return _extract_not_after(der), None
-    except (ssl.SSLError, socket.timeout, ConnectionError, OSError, ValueError, KeyError, IndexError) as e:
+    except (ValueError, IndexError) as e:
         return None, str(e)
 
 
+def positive_float(value):
+    """argparse type for --timeout: a number of seconds greater than zero."""
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: '{value}'")
+    if not seconds > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got '{value}'")
+    return seconds
+
+
+def non_negative_int(value):
+    """argparse type for -w: a whole number, 0 meaning no limit."""
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: '{value}'")
+    if count < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got '{value}'")
+    return count
+
+
 def create_sample_domains_file(filename):
     sample_domains = ["google.com", "github.com", "stackoverflow.com", "cloudflare.com", "mozilla.org"]
     with open(filename, "w") as file:
         for domain in sample_domains:
             file.write(f"{domain}\n")
-    print(f"{Colors.GREEN}✓{Colors.END} Sample domains file created: {Colors.CYAN}{filename}{Colors.END}")
+    print(f"{COLORS.GREEN}✓{COLORS.END} Sample domains file created: {COLORS.CYAN}{filename}{COLORS.END}")
 
 
 def classify(days_remaining, error, threshold):
@@ -231,20 +624,29 @@ Examples:
     parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help=f"SSL port to check (default: {DEFAULT_PORT})")
     parser.add_argument("--create-sample", action="store_true", help="Create sample 'domains.txt' file")
     parser.add_argument("--no-color", action="store_true", help="Disable colored output")
-    parser.add_argument("-w", "--workers", type=int, default=10, help="Number of concurrent workers (default: 10)")
+    parser.add_argument("--timeout", type=positive_float, default=CONNECT_TIMEOUT,
+                        help=f"Seconds allowed per domain for connect and handshake (default: {CONNECT_TIMEOUT})")
+    parser.add_argument("-w", "--workers", type=non_negative_int, default=DEFAULT_WORKERS, help=f"Maximum concurrent checks, 0 for no limit (default: {DEFAULT_WORKERS})")
     parser.add_argument("--log-file", help="Log file path for cron job integration")
     parser.add_argument("--json", action="store_true", help="Emit results as JSON (disables all decorative output)")
+    parser.add_argument("--force", action="store_true", help="Ignore cached results and check every domain")
+    parser.add_argument("--cache", default=CACHE_PATH, metavar="PATH",
+                        help="Result cache file (default: ~/.cache/sslcheck.json)")
+    parser.add_argument("--share-san", action="store_true",
+                        help="Skip the handshake for a domain listed in the subjectAltName of a certificate already fetched from the same address")
+    parser.add_argument("--raw-hello", action="store_true",
+                        help="Read certificates from a minimal TLS 1.2 ClientHello, falling back to a full handshake")
 
     args = parser.parse_args()
 
     is_tty = sys.stdout.isatty()
     json_mode = args.json
-    if args.no_color or not is_tty or json_mode:
-        Colors.disable()
-    animate = is_tty and not json_mode
+    global COLORS
+    COLORS = _PLAIN if args.no_color or not is_tty or json_mode else _ANSI
+    # --log-file means cron: keep the output plain even if a TTY is attached.
+    animate = is_tty and not json_mode and not args.log_file
 
-    if args.log_file:
-        setup_logging(args.log_file)
+    log = setup_logging(args.log_file) if args.log_file else None
 
     if args.create_sample:
         create_sample_domains_file("domains.txt")
@@ -254,212 +656,354 @@ Examples:
 
     threshold = args.threshold if args.threshold is not None else args.alert
     if threshold is None:
-        threshold = get_alert_days_from_config(config)
+        threshold = config.get('alert_days', DAYS_THRESHOLD)
 
     domains = []
     if args.domains:
         domains = args.domains
     elif args.file:
         if not os.path.exists(args.file):
-            print(f"{Colors.RED}Error:{Colors.END} File '{args.file}' not found", file=sys.stderr)
+            print(f"{COLORS.RED}Error:{COLORS.END} File '{args.file}' not found", file=sys.stderr)
             sys.exit(1)
         try:
             with open(args.file, "r") as file:
-                domains = [line.strip() for line in file if line.strip()]
+                domains = list(filter(None, map(str.strip, file)))
         except Exception as e:
-            print(f"{Colors.RED}Error reading file:{Colors.END} {e}", file=sys.stderr)
+            print(f"{COLORS.RED}Error reading file:{COLORS.END} {e}", file=sys.stderr)
             sys.exit(1)
     else:
-        domains = parse_domains_from_config(config)
+        domains = config.get('domains', [])
+
+    targets = dedupe_targets(domains, args.port)
+    domains = list(targets)
 
     if not domains:
-        print(f"{Colors.RED}Error:{Colors.END} No domains specified", file=sys.stderr)
-        print(f"{Colors.YELLOW}Tip:{Colors.END} Use -d, -f, or configure domains in sslcheck.conf", file=sys.stderr)
-        print(f"{Colors.YELLOW}Tip:{Colors.END} Use --create-sample to create an example file", file=sys.stderr)
+        print(f"{COLORS.RED}Error:{COLORS.END} No domains specified", file=sys.stderr)
+        print(f"{COLORS.YELLOW}Tip:{COLORS.END} Use -d, -f, or configure domains in sslcheck.conf", file=sys.stderr)
+        print(f"{COLORS.YELLOW}Tip:{COLORS.END} Use --create-sample to create an example file", file=sys.stderr)
         sys.exit(1)
 
-    if args.log_file:
-        logging.info(f"SSL Certificate check started for {len(domains)} domains")
-        logging.info(f"Domains: {', '.join(domains)}")
-        logging.info(f"Port: {args.port}, Threshold: {threshold} days")
+    # host:port entries override -p, so only name a port that every target uses.
+    ports = {port for _, port in targets.values()}
+    port_text = f"port {next(iter(ports))}" if len(ports) == 1 else "mixed ports"
+
+    if log:
+        log.info(f"SSL Certificate check started for {len(domains)} domains")
+        log.info(f"Domains: {', '.join(domains)}")
+        log.info(f"Port: {next(iter(ports)) if len(ports) == 1 else 'mixed'}, Threshold: {threshold} days")
 
-    current_date = datetime.now().date()
+    # Checks are coroutines, not threads: -w 0 lets every domain run at once.
+    workers = min(args.workers, len(domains)) if args.workers else len(domains)
+    today = date.today().toordinal()
+    cache = load_cache(args.cache)
+    cache_dirty = [False]
 
     if not json_mode:
-        print(f"{Colors.BOLD}SSL Certificate Checker{Colors.END}")
-        print(f"{Colors.GRAY}{len(domains)} domain(s) · port {args.port} · threshold {threshold}d · {args.workers} workers{Colors.END}")
-        print(f"{Colors.GRAY}{'─' * 72}{Colors.END}")
+        print(f"{COLORS.BOLD}SSL Certificate Checker{COLORS.END}")
+        print(f"{COLORS.GRAY}{len(domains)} domain(s) · {port_text} · threshold {threshold}d · {workers} worker(s){COLORS.END}")
+        print(f"{COLORS.GRAY}{'─' * 72}{COLORS.END}")
 
-    state = {d: {'status': 'pending', 'start': time.monotonic(), 'elapsed': None} for d in domains}
-    state_lock = Lock()
+    started = time.monotonic()
     spinner_pos = [0]
     lines_rendered = [0]
-    stop_spinner = [False]
+    finished = []  # (domain, status, elapsed) not yet applied to `state`
+    wake = [None]  # asyncio.Event set on each completion, created inside the loop
+    resolver = [None]  # thread pool for DNS, see check_all()
+
+    if animate:
+        # Per-domain display state is only needed to redraw the live block.
+        state = {}  # domain -> {'status', 'elapsed'} once finished
+        pending = dict.fromkeys(domains)  # rows still drawn as checking, in display order
+        row_index = {d: i for i, d in enumerate(domains)}
+        # 1-based column of the elapsed timer on a pending row: glyph, space,
+        # padded label, space, 'checking… '.
+        timer_col = {d: max(45, len(d)) + 14 for d in domains}
+        # Frames are assembled as bytes from templates fixed once colors are
+        # settled, and handed to the fd in one os.write, bypassing the
+        # TextIOWrapper lock and encoder.
+        out_fd = sys.stdout.fileno()
+        row_label = {d: f"{d:<45}".encode() for d in domains}
+        spin_glyphs = [f"{COLORS.YELLOW}{c}{COLORS.END}".encode() for c in SPINNER_CHARS]
+        pending_row = f"%b %b {COLORS.GRAY}checking… %4.1fs{COLORS.END}\n".encode()
+        done_row = f"{COLORS.GREEN}✓{COLORS.END} %b {COLORS.GRAY}done      %4.1fs{COLORS.END}".encode()
+        error_row = f"{COLORS.RED}✗{COLORS.END} %b {COLORS.GRAY}error     %4.1fs{COLORS.END}".encode()
+        progress_row = f"{COLORS.CYAN}%d/%d complete{COLORS.END}".encode()
+        timer_fmt = f"{COLORS.GRAY}%4.1fs{COLORS.END}".encode()
+
+    def write_frame(buf):
+        view = memoryview(buf)
+        while view:
+            view = view[os.write(out_fd, view):]
 
     def render_live():
-        """Render status block in-place; called under state_lock."""
-        out = sys.stdout
-        if lines_rendered[0]:
-            out.write(f'\033[{lines_rendered[0]}A')
-        spin = SPINNER_CHARS[spinner_pos[0] % len(SPINNER_CHARS)]
-        count = 0
+        """Draw the first frame, every row still pending, with a single write."""
+        buf = bytearray()
+        spin = spin_glyphs[spinner_pos[0]]
+        now = time.monotonic() - started
         for d in domains:
-            st = state[d]
-            if st['status'] == 'pending':
-                elapsed = time.monotonic() - st['start']
-                line = f"{Colors.YELLOW}{spin}{Colors.END} {d:<45} {Colors.GRAY}checking… {elapsed:>4.1f}s{Colors.END}"
-            elif st['status'] == 'completed':
-                line = f"{Colors.GREEN}✓{Colors.END} {d:<45} {Colors.GRAY}done      {st['elapsed']:>4.1f}s{Colors.END}"
-            else:
-                line = f"{Colors.RED}✗{Colors.END} {d:<45} {Colors.GRAY}error     {st['elapsed']:>4.1f}s{Colors.END}"
-            out.write(f'\r\033[K{line}\n')
-            count += 1
-        done = sum(1 for d in domains if state[d]['status'] != 'pending')
-        out.write(f'\r\033[K{Colors.CYAN}{done}/{len(domains)} complete{Colors.END}\n')
-        count += 1
-        lines_rendered[0] = count
-        out.flush()
+            buf += pending_row % (spin, row_label[d], now)
+        buf += progress_row % (0, len(domains)) + b'\n'
+        lines_rendered[0] = len(domains) + 1
+        write_frame(buf)
+
+    def finished_row(d):
+        st = state[d]
+        return (done_row if st['status'] == 'completed' else error_row) % (row_label[d], st['elapsed'])
+
+    def tick_spinners(changed=()):
+        """Rewrite the rows in `changed` and the progress line, then repaint
+        only the glyph and timer of each pending row."""
+        buf = bytearray()
+        if changed:
+            # Finished rows are no wider than the pending row they replace,
+            # so overwriting in place leaves nothing behind.
+            for d in changed:
+                up = lines_rendered[0] - row_index[d]
+                buf += b'\033[%dF%b\033[%dE' % (up, finished_row(d), up)
+            buf += b'\033[1F%b\033[1E' % (progress_row % (len(domains) - len(pending), len(domains)))
+        glyph = spin_glyphs[spinner_pos[0]]
+        timer = timer_fmt % (time.monotonic() - started)
+        for d in pending:
+            up = lines_rendered[0] - row_index[d]
+            buf += b'\033[%dF%b\033[%dG%b\033[%dE' % (up, glyph, timer_col[d], timer, up)
+        write_frame(buf)
 
     def mark_done(domain, status):
-        with state_lock:
-            st = state[domain]
-            st['status'] = status
-            st['elapsed'] = time.monotonic() - st['start']
-            if animate:
-                render_live()
-            elif not json_mode:
-                icon = f"{Colors.GREEN}✓{Colors.END}" if status == 'completed' else f"{Colors.RED}✗{Colors.END}"
-                print(f"{icon} {domain} ({st['elapsed']:.1f}s)")
-
-    def check_domain(domain):
-        expiry_date, error = get_certificate_expiry(domain, args.port)
+        elapsed = time.monotonic() - started
+        if animate:
+            finished.append((domain, status, elapsed))
+            wake[0].set()
+        elif not json_mode:
+            icon = f"{COLORS.GREEN}✓{COLORS.END}" if status == 'completed' else f"{COLORS.RED}✗{COLORS.END}"
+            print(f"{icon} {domain} ({elapsed:.1f}s)")
+
+    cdn_ranges = config.get('cdn_ranges', [])
+    endpoint_certs = {}  # (address or CDN network, port) -> [(dns_names, expiry, fingerprint)], for --share-san
+    endpoint_probes = {}  # same key -> handshakes in flight for it
+
+    def covering_cert(key, host):
+        for names, expiry, digest in endpoint_certs.get(key, ()):
+            if san_covers(names, host):
+                return expiry, digest, None
+        return None
+
+    async def probe(host, port, lookup, limit, fetch, key):
+        async with limit:
+            der, error = await fetch(host, port, lookup, args.timeout)
+        if error:
+            return None, None, error
+        try:
+            expiry = _extract_not_after(der)
+        except (ValueError, IndexError) as e:
+            return None, None, str(e)
+        try:
+            names = _extract_dns_names(der)
+        except (ValueError, IndexError):  # e.g. a non-ASCII dNSName
+            names = []  # the expiry still stands; the cert just isn't shared
+        digest = cert_fingerprint(der)
+        endpoint_certs.setdefault(key, []).append((set(names), expiry, digest))
+        return expiry, digest, None
+
+    async def probe_shared(host, port, lookup, limit, fetch):
+        """Probe host unless a cert already fetched from its address lists it in subjectAltName."""
+        try:
+            addrs = await lookup
+        except (OSError, ValueError) as e:
+            return None, None, str(e)
+        key = endpoint_key(addrs, port, cdn_ranges)
+        shared = covering_cert(key, host)
+        if shared:
+            return shared
+        # Let the handshakes already under way for this endpoint finish, in
+        # case one of them covers host, but don't queue behind later ones:
+        # sites with their own certificates still probe in parallel.
+        in_flight = endpoint_probes.setdefault(key, set())
+        if in_flight:
+            await asyncio.wait(list(in_flight))
+            shared = covering_cert(key, host)
+            if shared:
+                return shared
+        task = asyncio.ensure_future(probe(host, port, lookup, limit, fetch, key))
+        in_flight.add(task)
+        try:
+            return await task
+        finally:
+            in_flight.discard(task)
+
+    async def check_domain(domain, limit):
+        host, port = targets[domain]
+        expiry_date, error = None, None
+        if not args.force:
+            expiry_date = cached_expiry(cache, host, port, today, threshold)
+        if not expiry_date:
+            # Resolve now, outside the concurrency limit, so every lookup runs
+            # in parallel and is usually done by the time a slot frees up.
+            lookup = asyncio.ensure_future(resolve(host, port, resolver[0]))
+            raw = args.raw_hello or (not args.force and raw_probe_enough(cache, host, port, today, threshold))
+            fetch = fetch_certificate_raw if raw else fetch_certificate
+            if args.share_san:
+                expiry_date, digest, error = await probe_shared(host, port, lookup, limit, fetch)
+            else:
+                async with limit:
+                    der, error = await fetch(host, port, lookup, args.timeout)
+                if der:
+                    try:
+                        expiry_date, digest = _extract_not_after(der), cert_fingerprint(der)
+                    except (ValueError, IndexError) as e:
+                        error = str(e)
+            if expiry_date:
+                key = f"{host}:{port}"
+                previous = cache.get(key)
+                if log and isinstance(previous, dict) and previous.get('sha256') not in (None, digest):
+                    log.info(f"{domain}: certificate changed (sha256 {digest})")
+                cache[key] = {'expiry': expiry_date.isoformat(), 'checked': time.time(), 'sha256': digest}
+                cache_dirty[0] = True
         if expiry_date:
-            days_remaining = (expiry_date - current_date).days
+            days_remaining = expiry_date.toordinal() - today
             mark_done(domain, 'completed')
-            return {'domain': domain, 'port': args.port, 'expiry_date': expiry_date,
-                    'days_remaining': days_remaining, 'error': None}
+            return {'domain': host, 'port': port, 'label': domain, 'expiry_date': expiry_date,
+                    'days_remaining': days_remaining, 'error': None, 'sort_key': days_remaining}
         mark_done(domain, 'error')
-        return {'domain': domain, 'port': args.port, 'expiry_date': None,
-                'days_remaining': None, 'error': error}
-
-    def spinner_ticker():
-        while not stop_spinner[0]:
-            with state_lock:
-                if not any(state[d]['status'] == 'pending' for d in domains):
-                    break
-                spinner_pos[0] += 1
-                render_live()
-            time.sleep(0.1)
-
-    results = []
+        # Errors sort after every certificate, in input order.
+        return {'domain': host, 'port': port, 'label': domain, 'expiry_date': None,
+                'days_remaining': None, 'error': error, 'sort_key': sys.maxsize}
+
+    async def render_loop():
+        # Completions are only queued on `finished`; this task is the sole
+        # owner of `state` and of the terminal, so any number of them are
+        # applied in one batch. After the first full frame only the rows that
+        # changed, the progress line and the spinner glyphs are rewritten.
+        # A completion wakes the loop, but frames stay at least FRAME_INTERVAL
+        # apart: whatever finishes before the next slot joins that frame. The
+        # loop returns once the last row is drawn.
+        render_live()
+        last_frame = time.monotonic()
+        while pending:
+            try:
+                await asyncio.wait_for(wake[0].wait(), FRAME_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            delay = last_frame + FRAME_INTERVAL - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            wake[0].clear()
+            changed = [domain for domain, _, _ in finished]
+            for domain, status, elapsed in finished:
+                state[domain] = {'status': status, 'elapsed': elapsed}
+                del pending[domain]
+            finished.clear()
+            # Frames no longer come at a fixed rate, so the glyph follows the clock.
+            spinner_pos[0] = int((time.monotonic() - started) / FRAME_INTERVAL) % len(SPINNER_CHARS)
+            tick_spinners(changed)
+            last_frame = time.monotonic()
+
+    async def check_all():
+        limit = asyncio.Semaphore(workers)
+        wake[0] = asyncio.Event()
+        # Lookups get their own pool, wider than the loop's default executor,
+        # so a cold resolver doesn't hold TLS work back. Threads are only
+        # started as lookups need them.
+        from concurrent.futures import ThreadPoolExecutor
+        resolver[0] = ThreadPoolExecutor(RESOLVER_THREADS)
+        renderer = asyncio.ensure_future(render_loop()) if animate else None
+        try:
+            return await asyncio.gather(*(check_domain(d, limit) for d in domains))
+        finally:
+            resolver[0].shutdown(wait=False)
+            if renderer:
+                renderer.cancel()
+
     try:
         if animate:
             sys.stdout.write('\033[?25l')
             sys.stdout.flush()
-            with state_lock:
-                render_live()
-            Thread(target=spinner_ticker, daemon=True).start()
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as executor:
-            futures = [executor.submit(check_domain, d) for d in domains]
-            for future in concurrent.futures.as_completed(futures):
-                results.append(future.result())
+        results = asyncio.run(check_all())
+        if cache_dirty[0]:
+            save_cache(args.cache, cache)
 
-        if animate:
-            stop_spinner[0] = True
-            with state_lock:
-                if lines_rendered[0]:
-                    sys.stdout.write(f'\033[{lines_rendered[0]}A')
-                    for _ in range(lines_rendered[0]):
-                        sys.stdout.write('\033[K\n')
-                    sys.stdout.write(f'\033[{lines_rendered[0]}A')
-                    sys.stdout.flush()
+        if animate and lines_rendered[0]:
+            sys.stdout.write(f'\033[{lines_rendered[0]}F\033[J')
+            sys.stdout.flush()
     finally:
         if animate:
             sys.stdout.write('\033[?25h')
             sys.stdout.flush()
 
-    results.sort(key=lambda x: (x['error'] is not None, x['days_remaining'] if x['days_remaining'] is not None else -999))
+    results.sort(key=itemgetter('sort_key'))
 
-    valid_count = warning_count = expired_count = error_count = 0
+    counts = dict.fromkeys(('valid', 'expiring', 'expired', 'error'), 0)
     for r in results:
-        c = classify(r['days_remaining'], r['error'], threshold)
-        if c == 'valid':
-            valid_count += 1
-        elif c == 'expiring':
-            warning_count += 1
-        elif c == 'expired':
-            expired_count += 1
-        else:
-            error_count += 1
+        r['status'] = classify(r['days_remaining'], r['error'], threshold)
+        counts[r['status']] += 1
+    valid_count, warning_count, expired_count, error_count = counts.values()
 
     if json_mode:
         payload = [{
             'domain': r['domain'],
             'port': r['port'],
-            'status': classify(r['days_remaining'], r['error'], threshold),
+            'status': r['status'],
             'expiry_date': r['expiry_date'].isoformat() if r['expiry_date'] else None,
             'days_remaining': r['days_remaining'],
             'error': r['error'],
         } for r in results]
+        import json
         print(json.dumps(payload, indent=2))
     else:
-        print(f"{Colors.GRAY}{'─' * 72}{Colors.END}")
-        print(f"{Colors.BOLD}Results{Colors.END}")
-        print(f"{Colors.GRAY}{'─' * 72}{Colors.END}")
+        # The report is built as a list of lines and written in one call.
+        rule = f"{COLORS.GRAY}{'─' * 72}{COLORS.END}"
+        out = [rule, f"{COLORS.BOLD}Results{COLORS.END}", rule]
+        styles = {
+            'expired': (COLORS.RED, '🔴', 'EXPIRED'),
+            'expiring': (COLORS.YELLOW, '🟡', 'EXPIRING'),
+            'valid': (COLORS.GREEN, '🟢', 'VALID'),
+        }
         for r in results:
-            domain = r['domain']
-            if r['error']:
-                print(f"{Colors.RED}✗{Colors.END} {domain:<35} {Colors.RED}{'ERROR':<10}{Colors.END} {Colors.GRAY}{r['error'][:50]}{Colors.END}")
+            domain = r['label']
+            if r['status'] == 'error':
+                out.append(f"{COLORS.RED}✗{COLORS.END} {domain:<35} {COLORS.RED}{'ERROR':<10}{COLORS.END} {COLORS.GRAY}{r['error'][:50]}{COLORS.END}")
             else:
-                days = r['days_remaining']
-                if days <= 0:
-                    color, icon, text = Colors.RED, '🔴', 'EXPIRED'
-                elif days <= threshold:
-                    color, icon, text = Colors.YELLOW, '🟡', 'EXPIRING'
-                else:
-                    color, icon, text = Colors.GREEN, '🟢', 'VALID'
-                print(f"{icon} {domain:<35} {color}{text:<10}{Colors.END} {Colors.GRAY}expires {r['expiry_date']} ({days}d){Colors.END}")
-        print(f"{Colors.GRAY}{'─' * 72}{Colors.END}")
+                color, icon, text = styles[r['status']]
+                out.append(f"{icon} {domain:<35} {color}{text:<10}{COLORS.END} {COLORS.GRAY}expires {r['expiry_date']} ({r['days_remaining']}d){COLORS.END}")
+        out.append(rule)
 
         total = len(domains)
-        bar_width = 30
 
         def bar(count, color):
-            filled = int(bar_width * count / total) if total else 0
-            return f"{color}{'█' * filled}{Colors.GRAY}{'░' * (bar_width - filled)}{Colors.END}"
+            filled = BAR_WIDTH * count // total if total else 0
+            return f"{color}{_BAR_FULL[:filled]}{COLORS.GRAY}{_BAR_EMPTY[filled:]}{COLORS.END}"
 
-        print(f"{Colors.BOLD}Summary{Colors.END}")
+        out.append(f"{COLORS.BOLD}Summary{COLORS.END}")
         if valid_count:
-            print(f"  {Colors.GREEN}valid    {Colors.END} {bar(valid_count, Colors.GREEN)}  {valid_count}/{total}")
+            out.append(f"  {COLORS.GREEN}valid    {COLORS.END} {bar(valid_count, COLORS.GREEN)}  {valid_count}/{total}")
         if warning_count:
-            print(f"  {Colors.YELLOW}expiring {Colors.END} {bar(warning_count, Colors.YELLOW)}  {warning_count}/{total}")
+            out.append(f"  {COLORS.YELLOW}expiring {COLORS.END} {bar(warning_count, COLORS.YELLOW)}  {warning_count}/{total}")
         if expired_count:
-            print(f"  {Colors.RED}expired  {Colors.END} {bar(expired_count, Colors.RED)}  {expired_count}/{total}")
+            out.append(f"  {COLORS.RED}expired  {COLORS.END} {bar(expired_count, COLORS.RED)}  {expired_count}/{total}")
         if error_count:
-            print(f"  {Colors.RED}errors   {Colors.END} {bar(error_count, Colors.RED)}  {error_count}/{total}")
-        print(f"{Colors.GRAY}{'─' * 72}{Colors.END}")
+            out.append(f"  {COLORS.RED}errors   {COLORS.END} {bar(error_count, COLORS.RED)}  {error_count}/{total}")
+        out.append(rule)
 
         if expired_count or error_count:
-            print(f"{Colors.RED}✗ attention required{Colors.END}")
+            out.append(f"{COLORS.RED}✗ attention required{COLORS.END}")
         elif warning_count:
-            print(f"{Colors.YELLOW}! monitoring needed{Colors.END}")
+            out.append(f"{COLORS.YELLOW}! monitoring needed{COLORS.END}")
         else:
-            print(f"{Colors.GREEN}✓ all certificates healthy{Colors.END}")
+            out.append(f"{COLORS.GREEN}✓ all certificates healthy{COLORS.END}")
+        sys.stdout.write('\n'.join(out) + '\n')
 
-    if args.log_file:
-        logging.info("SSL Certificate check completed")
-        logging.info(f"Results: {valid_count} valid, {warning_count} expiring soon, {expired_count} expired, {error_count} errors")
+    if log:
+        log.info("SSL Certificate check completed")
+        log.info(f"Results: {valid_count} valid, {warning_count} expiring soon, {expired_count} expired, {error_count} errors")
         for r in results:
-            if r['error']:
-                logging.error(f"{r['domain']}: {r['error']}")
-            elif r['days_remaining'] is not None:
-                if r['days_remaining'] <= 0:
-                    logging.critical(f"{r['domain']}: Certificate EXPIRED on {r['expiry_date']}")
-                elif r['days_remaining'] <= threshold:
-                    logging.warning(f"{r['domain']}: Certificate expires in {r['days_remaining']} days on {r['expiry_date']}")
-                else:
-                    logging.info(f"{r['domain']}: Certificate valid for {r['days_remaining']} days (expires {r['expiry_date']})")
+            if r['status'] == 'error':
+                log.error(f"{r['label']}: {r['error']}")
+            elif r['status'] == 'expired':
+                log.critical(f"{r['label']}: Certificate EXPIRED on {r['expiry_date']}")
+            elif r['status'] == 'expiring':
+                log.warning(f"{r['label']}: Certificate expires in {r['days_remaining']} days on {r['expiry_date']}")
+            else:
+                log.info(f"{r['label']}: Certificate valid for {r['days_remaining']} days (expires {r['expiry_date']})")
 
     sys.exit(1 if expired_count or error_count else 0)
 
@@ -0,0 +1,386 @@
+"""Fixed-input checks for sslcheck's hand-rolled parsers and helpers."""
+
+import asyncio
+import io
+import ipaddress
+import os
+import socket
+import sys
+import tempfile
+import time
+import unittest
+from datetime import date
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sslcheck  # noqa: E402
+
+
+def tlv(tag, *parts):
+    """DER-encode one element with the given tag around the concatenated parts."""
+    body = b''.join(parts)
+    if len(body) < 0x80:
+        length = bytes([len(body)])
+    else:
+        digits = len(body).to_bytes((len(body).bit_length() + 7) // 8, 'big')
+        length = bytes([0x80 | len(digits)]) + digits
+    return bytes([tag]) + length + body
+
+
+def extension(oid, value, critical=False):
+    return tlv(0x30, tlv(0x06, oid), *([tlv(0x01, b'\xff')] if critical else []), tlv(0x04, value))
+
+
+def san(*names, critical=False):
+    return extension(b'\x55\x1d\x11', tlv(0x30, *names), critical)
+
+
+def dns(name):
+    return tlv(0x82, name.encode())
+
+
+BASIC_CONSTRAINTS = extension(b'\x55\x1d\x13', tlv(0x30), critical=True)
+
+
+def make_cert(not_after=tlv(0x17, b'270123120000Z'), extensions=None):
+    """A structurally valid certificate; only the fields sslcheck reads carry meaning."""
+    tbs = [
+        tlv(0xA0, tlv(0x02, b'\x02')),                 # version v3
+        tlv(0x02, b'\x01'),                            # serialNumber
+        tlv(0x30, tlv(0x06, b'\x2a\x86\x48\xce\x3d\x04\x03\x02')),
+        tlv(0x30),                                     # issuer
+        tlv(0x30, tlv(0x17, b'260101000000Z'), not_after),
+        tlv(0x30),                                     # subject
+        tlv(0x30, tlv(0x30), tlv(0x03, b'\x00')),      # subjectPublicKeyInfo
+    ]
+    if extensions is not None:
+        tbs.append(tlv(0xA3, tlv(0x30, *extensions)))
+    return tlv(0x30, tlv(0x30, *tbs), tlv(0x30), tlv(0x03, b'\x00'))
+
+
+def record(content_type, body):
+    return bytes([content_type, 3, 3]) + len(body).to_bytes(2, 'big') + body
+
+
+def handshake(msg_type, body):
+    return bytes([msg_type]) + len(body).to_bytes(3, 'big') + body
+
+
+def certificate_message(*ders):
+    entries = b''.join(len(der).to_bytes(3, 'big') + der for der in ders)
+    return handshake(11, len(entries).to_bytes(3, 'big') + entries)
+
+
+SERVER_HELLO = handshake(2, b'\x03\x03' + bytes(32) + b'\x00' + b'\xc0\x2f' + b'\x00')
+SERVER_HELLO_DONE = handshake(14, b'')
+
+
+def read_certificate(data):
+    stream = io.BytesIO(data)
+
+    async def readexactly(n):
+        chunk = stream.read(n)
+        if len(chunk) < n:
+            raise asyncio.IncompleteReadError(chunk, n)
+        return chunk
+
+    return asyncio.run(sslcheck._read_certificate(readexactly))
+
+
+class ReadCertificateTest(unittest.TestCase):
+    def test_single_record(self):
+        der = make_cert()
+        data = record(22, SERVER_HELLO + certificate_message(der, make_cert()) + SERVER_HELLO_DONE)
+        self.assertEqual(read_certificate(data), der)
+
+    def test_certificate_split_across_records(self):
+        der = make_cert(extensions=[san(*(dns(f"host{n}.example.com") for n in range(20)))])
+        message = certificate_message(der)
+        cut = len(message) // 2
+        data = record(22, SERVER_HELLO) + record(22, message[:cut]) + record(22, message[cut:])
+        self.assertEqual(read_certificate(data), der)
+
+    def test_server_hello_split_across_records(self):
+        der = make_cert()
+        data = record(22, SERVER_HELLO[:10]) + record(22, SERVER_HELLO[10:] + certificate_message(der))
+        self.assertEqual(read_certificate(data), der)
+
+    def test_alert(self):
+        with self.assertRaisesRegex(ValueError, "TLS alert 40"):
+            read_certificate(record(21, b'\x02\x28'))
+
+    def test_server_hello_done_without_certificate(self):
+        with self.assertRaisesRegex(ValueError, "no certificate"):
+            read_certificate(record(22, SERVER_HELLO + SERVER_HELLO_DONE))
+
+    def test_empty_certificate_list(self):
+        with self.assertRaisesRegex(ValueError, "no certificate"):
+            read_certificate(record(22, SERVER_HELLO + certificate_message()))
+
+    def test_not_a_handshake_record(self):
+        with self.assertRaisesRegex(ValueError, "unexpected TLS record"):
+            read_certificate(record(23, b'\x00' * 8))
+
+    def test_truncated_reply(self):
+        message = certificate_message(make_cert())
+        with self.assertRaises(EOFError):
+            read_certificate(record(22, SERVER_HELLO) + record(22, message)[:20])
+
+
+class ClientHelloTest(unittest.TestCase):
+    def extensions(self, hello):
+        self.assertEqual(hello[:3], b'\x16\x03\x01')
+        self.assertEqual(int.from_bytes(hello[3:5], 'big'), len(hello) - 5)
+        self.assertEqual(hello[5], 1)
+        self.assertEqual(int.from_bytes(hello[6:9], 'big'), len(hello) - 9)
+        i = 9 + 2 + 32
+        i += 1 + hello[i]                                   # session_id
+        i += 2 + int.from_bytes(hello[i:i + 2], 'big')      # cipher_suites
+        i += 1 + hello[i]                                   # compression_methods
+        end = i + 2 + int.from_bytes(hello[i:i + 2], 'big')
+        self.assertEqual(end, len(hello))
+        i += 2
+        found = {}
+        while i < end:
+            ext_type = int.from_bytes(hello[i:i + 2], 'big')
+            length = int.from_bytes(hello[i + 2:i + 4], 'big')
+            found[ext_type] = hello[i + 4:i + 4 + length]
+            i += 4 + length
+        self.assertEqual(i, end)
+        return found
+
+    def test_sni(self):
+        found = self.extensions(sslcheck._client_hello('example.com'))
+        self.assertEqual(found[0], b'\x00\x0e\x00\x00\x0bexample.com')
+
+    def test_no_sni_for_ip_literals(self):
+        for host in ('192.0.2.1', '2001:db8::1'):
+            self.assertNotIn(0, self.extensions(sslcheck._client_hello(host)))
+
+
+class ExtractDnsNamesTest(unittest.TestCase):
+    def test_names_are_lowercased_and_other_types_skipped(self):
+        der = make_cert(extensions=[san(dns('Example.COM'), tlv(0x87, b'\xc0\x00\x02\x01'), dns('*.example.com'))])
+        self.assertEqual(sslcheck._extract_dns_names(der), ['example.com', '*.example.com'])
+
+    def test_critical_san_after_other_extension(self):
+        der = make_cert(extensions=[BASIC_CONSTRAINTS, san(dns('a.example.com'), critical=True)])
+        self.assertEqual(sslcheck._extract_dns_names(der), ['a.example.com'])
+
+    def test_no_extensions(self):
+        self.assertEqual(sslcheck._extract_dns_names(make_cert()), [])
+
+    def test_extensions_without_san(self):
+        self.assertEqual(sslcheck._extract_dns_names(make_cert(extensions=[BASIC_CONSTRAINTS])), [])
+
+    def test_non_ascii_name_fails_without_touching_not_after(self):
+        der = make_cert(extensions=[san(tlv(0x82, 'bücher.example'.encode()))])
+        with self.assertRaises(ValueError):
+            sslcheck._extract_dns_names(der)
+        self.assertEqual(sslcheck._extract_not_after(der), date(2027, 1, 23))
+
+
+class ExtractNotAfterTest(unittest.TestCase):
+    def test_utc_time(self):
+        self.assertEqual(sslcheck._extract_not_after(make_cert()), date(2027, 1, 23))
+
+    def test_utc_time_century_pivot(self):
+        der = make_cert(not_after=tlv(0x17, b'500101000000Z'))
+        self.assertEqual(sslcheck._extract_not_after(der), date(1950, 1, 1))
+
+    def test_generalized_time(self):
+        der = make_cert(not_after=tlv(0x18, b'20510630235959Z'))
+        self.assertEqual(sslcheck._extract_not_after(der), date(2051, 6, 30))
+
+    def test_malformed_time(self):
+        with self.assertRaises(ValueError):
+            sslcheck._extract_not_after(make_cert(not_after=tlv(0x17, b'2701231200Z')))
+
+
+class CacheTest(unittest.TestCase):
+    TODAY = date(2026, 10, 15).toordinal()
+
+    def entry(self, expiry, age=0):
+        return {'expiry': expiry.isoformat(), 'checked': time.time() - age, 'sha256': 'ab'}
+
+    def test_save_load_round_trip(self):
+        cache = {'example.com:443': self.entry(date(2027, 1, 23))}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'sub', 'cache.json')
+            sslcheck.save_cache(path, cache)
+            self.assertEqual(sslcheck.load_cache(path), cache)
+            self.assertEqual(os.listdir(os.path.dirname(path)), ['cache.json'])
+
+    def test_save_relative_path(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                sslcheck.save_cache('cache.json', {'a:443': self.entry(date(2027, 1, 1))})
+                self.assertIn('a:443', sslcheck.load_cache('cache.json'))
+            finally:
+                os.chdir(cwd)
+
+    def test_load_missing_or_corrupt(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.json')
+            self.assertEqual(sslcheck.load_cache(path), {})
+            for content in ('{not json', '[1, 2]'):
+                with open(path, 'w') as f:
+                    f.write(content)
+                self.assertEqual(sslcheck.load_cache(path), {})
+
+    def test_cached_expiry(self):
+        far, near = date(2027, 1, 23), date(2026, 11, 1)
+        cache = {
+            'fresh:443': self.entry(far),
+            'stale:443': self.entry(far, age=sslcheck.CACHE_MAX_AGE + 60),
+            'near:443': self.entry(near),
+            'broken:443': {'expiry': 'soon', 'checked': 'never'},
+        }
+        self.assertEqual(sslcheck.cached_expiry(cache, 'fresh', 443, self.TODAY, 15), far)
+        self.assertIsNone(sslcheck.cached_expiry(cache, 'fresh', 8443, self.TODAY, 15))
+        for domain in ('stale', 'near', 'broken', 'missing'):
+            self.assertIsNone(sslcheck.cached_expiry(cache, domain, 443, self.TODAY, 15), domain)
+
+    def test_raw_probe_enough(self):
+        cache = {
+            'far:443': self.entry(date(2027, 1, 23), age=10 * 24 * 3600),
+            'near:443': self.entry(date(2026, 11, 10)),
+            'broken:443': 'not an entry',
+        }
+        self.assertTrue(sslcheck.raw_probe_enough(cache, 'far', 443, self.TODAY, 15))
+        for domain in ('near', 'broken', 'missing'):
+            self.assertFalse(sslcheck.raw_probe_enough(cache, domain, 443, self.TODAY, 15), domain)
+
+
+class ParseConfigTest(unittest.TestCase):
+    def test_default_section_only(self):
+        lines = [
+            '# leading comment\n',
+            '[DEFAULT]\n',
+            'alert_days = 30\n',
+            '; another comment\n',
+            'Domains: a.example, b.example\n',
+            '\n',
+            '[other]\n',
+            'alert_days = 99\n',
+            'extra = ignored\n',
+            '[DEFAULT]\n',
+            'cdn_ranges=10.0.0.0/8\n',
+        ]
+        self.assertEqual(sslcheck._parse_config(lines), {
+            'alert_days': '30',
+            'domains': 'a.example, b.example',
+            'cdn_ranges': '10.0.0.0/8',
+        })
+
+    def test_keys_before_any_section_count_as_default(self):
+        self.assertEqual(sslcheck._parse_config(['alert_days = 7\n']), {'alert_days': '7'})
+
+    def test_continuation_lines(self):
+        lines = ['[DEFAULT]\n', 'domains =\n', '    a.example\n', '    b.example:8443\n', 'alert_days = 5\n']
+        self.assertEqual(sslcheck._parse_config(lines),
+                         {'domains': '\na.example\nb.example:8443', 'alert_days': '5'})
+
+    def test_first_separator_wins(self):
+        self.assertEqual(sslcheck._parse_config(['url = https://x\n', 'a: b=c\n']),
+                         {'url': 'https://x', 'a': 'b=c'})
+
+    def test_line_without_separator_is_skipped(self):
+        self.assertEqual(sslcheck._parse_config(['garbage\n', '  more\n', 'k = v\n']), {'k': 'v'})
+
+
+class LoadConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.home = tempfile.TemporaryDirectory()
+        self.cwd = tempfile.TemporaryDirectory()
+        self.addCleanup(self.home.cleanup)
+        self.addCleanup(self.cwd.cleanup)
+        old_cwd = os.getcwd()
+        os.chdir(self.cwd.name)
+        self.addCleanup(os.chdir, old_cwd)
+        patcher = mock.patch.dict(os.environ, {'HOME': self.home.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, directory, name, text):
+        path = os.path.join(directory, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_no_files(self):
+        self.assertEqual(sslcheck.load_config(), {})
+
+    def test_merge_order(self):
+        self.write(self.home.name, 'sslcheck.conf', '[DEFAULT]\nalert_days = 10\ndomains = home.example\n')
+        self.write(self.cwd.name, 'sslcheck.conf', '[DEFAULT]\nalert_days = 20\n')
+        self.assertEqual(sslcheck.load_config(), {'alert_days': 20, 'domains': ['home.example']})
+        explicit = self.write(self.home.name, 'explicit.conf', '[DEFAULT]\nalert_days = 30\n')
+        self.assertEqual(sslcheck.load_config(explicit), {'alert_days': 30, 'domains': ['home.example']})
+
+    def test_values(self):
+        path = self.write(self.cwd.name, 'x.conf', (
+            '[DEFAULT]\n'
+            'domains = a.example,\n'
+            '    b.example, , c.example:8443\n'
+            'alert_days = soon\n'
+            'cdn_ranges = 192.0.2.7/24, bogus,\n'
+            '    2001:db8::/32\n'
+        ))
+        self.assertEqual(sslcheck.load_config(path), {
+            'domains': ['a.example', 'b.example', 'c.example:8443'],
+            'cdn_ranges': [ipaddress.ip_network('192.0.2.0/24'), ipaddress.ip_network('2001:db8::/32')],
+        })
+
+
+class TargetTest(unittest.TestCase):
+    def test_parse_target(self):
+        cases = {
+            'Example.COM': ('example.com', 443),
+            'example.com.': ('example.com', 443),
+            'example.com:8443': ('example.com', 8443),
+            'example.com:https': ('example.com:https', 443),
+            '[2001:DB8::1]:8443': ('2001:db8::1', 8443),
+            '[2001:db8::1]': ('2001:db8::1', 443),
+            '2001:db8::1': ('2001:db8::1', 443),
+        }
+        for entry, expected in cases.items():
+            self.assertEqual(sslcheck.parse_target(entry, 443), expected, entry)
+
+    def test_dedupe_keeps_first_label_in_order(self):
+        entries = ['b.example', ' A.example ', '', 'a.example:443', 'b.example:8443', 'B.EXAMPLE.']
+        self.assertEqual(sslcheck.dedupe_targets(entries, 443), {
+            'b.example': ('b.example', 443),
+            'A.example': ('a.example', 443),
+            'b.example:8443': ('b.example', 8443),
+        })
+
+
+class ShareSanTest(unittest.TestCase):
+    def test_san_covers(self):
+        names = {'example.com', '*.example.org'}
+        self.assertTrue(sslcheck.san_covers(names, 'example.com'))
+        self.assertTrue(sslcheck.san_covers(names, 'api.example.org'))
+        for host in ('www.example.com', 'example.org', 'a.b.example.org', 'org'):
+            self.assertFalse(sslcheck.san_covers(names, host), host)
+
+    def test_endpoint_key(self):
+        addrs = [(socket.AF_INET, ('198.51.100.9', 443)), (socket.AF_INET, ('192.0.2.5', 443))]
+        self.assertEqual(sslcheck.endpoint_key(addrs, 443), ('192.0.2.5', 443))
+        self.assertEqual(sslcheck.endpoint_key(addrs, 8443), ('192.0.2.5', 8443))
+
+    def test_endpoint_key_cdn_ranges(self):
+        networks = [ipaddress.ip_network('203.0.113.0/24'), ipaddress.ip_network('2001:db8::/32')]
+        v4 = [(socket.AF_INET, ('203.0.113.77', 443))]
+        v6 = [(socket.AF_INET6, ('2001:db8::5', 443, 0, 0)), (socket.AF_INET, ('192.0.2.1', 443))]
+        outside = [(socket.AF_INET, ('192.0.2.1', 443))]
+        self.assertEqual(sslcheck.endpoint_key(v4, 443, networks), ('203.0.113.0/24', 443))
+        self.assertEqual(sslcheck.endpoint_key(v6, 443, networks), ('2001:db8::/32', 443))
+        self.assertEqual(sslcheck.endpoint_key(outside, 443, networks), ('192.0.2.1', 443))
+
+
+if __name__ == '__main__':
+    unittest.main()